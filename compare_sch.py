@@ -1,7 +1,24 @@
+import sys
 import sqlite3
 import json
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Tuple
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
 class SchemaComparer:
     """
     一個用於比對 .sch 檔案和 SQLite 資料庫中結構定義的類別。
@@ -17,7 +34,35 @@ class SchemaComparer:
         """
         self.schema_file = schema_file
         self.db_path = db_path
-        self.differences: List[Dict] = []  # 用於儲存差異的列表
+        # 差異以扁平 tuple 儲存：(status, table, column, 檔案端三欄, 資料庫端三欄)，
+        # 缺少時資料庫端為 None；輸出時才組成 dict。
+        # (Differences are stored as flat tuples - (status, table, column,
+        # three file-side fields, three db-side fields, None when missing) -
+        # and only materialized into dicts at export/print time.)
+        self.differences: List[Tuple] = []
+        # 資料庫結構的快取索引：(table, column) -> (雜湊, type, size, position)。
+        # (Cached index of the database schema: (table, column) -> (hash, type, size, position).)
+        self._db_index: Dict[Tuple[str, str], Tuple[int, int, int, int]] = None
+        # 整個比對過程共用一條連線，讓 sqlite3 的內部敘述快取生效；
+        # 以唯讀 URI 開啟，不取得寫入鎖，平行比對的行程之間互不干擾。
+        # (One connection for the comparer's lifetime so sqlite3's statement cache is effective.
+        # The read-only URI takes no write locks, so parallel comparer processes don't contend.)
+        self._conn = sqlite3.connect(
+            f'file:{self.db_path}?mode=ro',
+            uri=True, check_same_thread=False, cached_statements=256
+        )
+        self._conn.execute('PRAGMA query_only=1')
+        self._conn.execute('PRAGMA temp_store=MEMORY')
+        self._conn.execute('PRAGMA cache_size=-65536')
+        # 透過 mmap 直接讀取資料庫頁面，省掉一次使用者空間的複製。
+        # (Read database pages via mmap, skipping one copy into user space.)
+        self._conn.execute('PRAGMA mmap_size=268435456')
+
+    def close(self):
+        """關閉資料庫連線。 (Close the database connection)"""
+        if self._conn:
+            self._conn.close()
+            self._conn = None
         
     def parse_schema_line(self, line: str) -> Tuple[str, str, str, str, str]:
         """解析 .sch 檔案中的單一行。 (Parse a single line from schema file)"""
@@ -27,96 +72,303 @@ class SchemaComparer:
         table_name, column_name, type_id, size, position, _ = parts
         return table_name, column_name, type_id, size, position
         
-    def get_db_column(self, table_name: str, column_name: str) -> Tuple[str, str, str]:
-        """從資料庫中獲取指定欄位的資訊。 (Get column info from database)"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT type_id, size, position 
-            FROM schema_def 
-            WHERE table_name = ? AND column_name = ?
-        ''', (table_name, column_name))
-        
-        result = cursor.fetchone()
-        conn.close()
-        
-        return result if result else None
-        
+    def get_db_column(self, table_name: str, column_name: str) -> Tuple[int, int, int]:
+        """從資料庫中獲取指定欄位的資訊。 (Get column info from database)
+
+        已棄用：請改用 _load_db_index 建立的索引。
+        (Deprecated: prefer the index built by _load_db_index.)
+        """
+        # 固定的 SQL 字串讓連線的敘述快取可以命中。
+        # (The identical SQL string each call lets the statement cache hit.)
+        return self._conn.execute(
+            'SELECT type_id, size, position FROM schema_def WHERE table_name = ? AND column_name = ?',
+            (table_name, column_name)
+        ).fetchone()
+
+    # 批次查詢時每批的 (table, column) 組數。
+    # (Number of (table, column) pairs fetched per batched query.)
+    _LOOKUP_CHUNK = 500
+
+    @staticmethod
+    def _row_hash(type_id: int, size: int, position: int) -> int:
+        """計算一列屬性的 64 位元雜湊值。 (Compute a 64-bit hash over one row's attributes)
+
+        比對時先比單一整數雜湊，不相等才展開三個欄位；
+        沒有 xxhash 時退回內建 hash()。
+        (The hot loop compares one integer hash first and only expands
+        the three fields on mismatch; falls back to the built-in hash()
+        when xxhash is unavailable.)
+        """
+        key = f"{type_id}\x1f{size}\x1f{position}"
+        if xxhash is not None:
+            return xxhash.xxh3_64_intdigest(key.encode())
+        return hash(key)
+
+    def _load_db_index(self, pairs: List[Tuple[str, str]] = None):
+        """載入 schema_def 成為記憶體索引。 (Load schema_def into an in-memory index)
+
+        給定 pairs 時，只以每批 500 組的批次查詢抓取需要的欄位；
+        否則載入整個資料表。
+        (With pairs, fetches only the needed columns in batches of 500
+        pairs per query; otherwise loads the whole table.)
+        """
+        if pairs is None:
+            rows = self._conn.execute(
+                'SELECT table_name, column_name, type_id, size, position FROM schema_def'
+            ).fetchall()
+        else:
+            rows = []
+            for i in range(0, len(pairs), self._LOOKUP_CHUNK):
+                chunk = pairs[i:i + self._LOOKUP_CHUNK]
+                placeholders = ','.join(['(?,?)'] * len(chunk))
+                params = [value for pair in chunk for value in pair]
+                rows.extend(self._conn.execute(
+                    'SELECT table_name, column_name, type_id, size, position '
+                    f'FROM schema_def WHERE (table_name, column_name) IN (VALUES {placeholders})',
+                    params
+                ).fetchall())
+
+        self._db_index = {
+            (r[0], r[1]): (self._row_hash(r[2], r[3], r[4]), r[2], r[3], r[4])
+            for r in rows
+        }
+
     def compare_schemas(self):
         """比較 .sch 檔案和資料庫之間的結構差異。 (Compare schema file with database)"""
         with open(self.schema_file, 'r') as f:
-            for line in f:
-                if not line.strip():
-                    continue
-                    
-                parsed = self.parse_schema_line(line)
-                if not parsed:
-                    continue
-                    
-                table_name, column_name, type_id, size, position = parsed
-                db_info = self.get_db_column(table_name, column_name)
-                
-                if not db_info:
-                    # 欄位在資料庫中不存在 (Column not found in database)
-                    self._record_difference(table_name, column_name, {
-                        "status": "missing_in_db",
-                        "file_info": {"type": type_id, "size": size, "position": position},
-                        "db_info": None
-                    })
-                    continue
-                
-                db_type, db_size, db_position = db_info
+            parsed_rows = [p for p in (self.parse_schema_line(l) for l in f if l.strip()) if p]
+
+        # 只抓取檔案中實際出現的欄位，而不是整個 schema_def。
+        # (Fetch only the columns that actually appear in the file.)
+        self._load_db_index([(r[0], r[1]) for r in parsed_rows])
+
+        for parsed in parsed_rows:
+            table_name, column_name, type_id, size, position = parsed
+            db_info = self._db_index.get((table_name, column_name))
+
+            if not db_info:
+                # 欄位在資料庫中不存在 (Column not found in database)
+                self._record_difference('missing_in_db', table_name, column_name,
+                                        type_id, size, position)
+                continue
+
+            db_hash, db_type, db_size, db_position = db_info
+
+            # 資料庫端存的是整數，檔案端轉成 int 再算雜湊比較；
+            # 非數值的欄位值必定與資料庫中的整數不同。
+            # (The database stores integers; cast the file side to int, then
+            # compare hashes. A non-numeric field value can never equal the
+            # integers in the database.)
+            try:
+                file_hash = self._row_hash(int(type_id), int(size), int(position))
+            except ValueError:
+                file_hash = None
+
+            if db_hash != file_hash:
+                self._record_difference('different', table_name, column_name,
+                                        type_id, size, position,
+                                        str(db_type), str(db_size), str(db_position))
                 
-                # 檢查屬性是否有差異 (Check for differences)
-                if db_type != type_id or db_size != size or db_position != position:
-                    self._record_difference(table_name, column_name, {
-                        "status": "different",
-                        "file_info": {"type": type_id, "size": size, "position": position},
-                        "db_info": {"type": db_type, "size": db_size, "position": db_position}
-                    })
-                    
-    def _record_difference(self, table_name: str, column_name: str, diff_info: Dict):
-        """將發現的差異記錄到列表中。 (Record a difference in the differences list)"""
-        record = {
-            "status": diff_info["status"],
-            "table": table_name,
-            "column": column_name,
-            "file_info": diff_info["file_info"],
-            "db_info": diff_info["db_info"]
-        }
-        self.differences.append(record)
-        
+    def compare_schemas_sql(self):
+        """在 SQLite 內以單一 LEFT JOIN 完成比對。 (Compare inside SQLite with a single LEFT JOIN)
+
+        將 .sch 的內容批次載入附掛的 :memory: 資料表，讓整個差異計算
+        以索引聯結在 C 層執行，而不是逐列在 Python 中查找。
+        (Bulk-loads the .sch rows into an attached :memory: table so the
+        whole diff runs as one indexed join at C speed instead of
+        per-row Python lookups.)
+        """
+        with open(self.schema_file, 'r') as f:
+            rows = [p for p in (self.parse_schema_line(l) for l in f if l.strip()) if p]
+
+        conn = self._conn
+        # 暫時允許寫入，但只寫到附掛的 :memory: 資料庫；無論成敗都要
+        # 還原唯讀狀態並卸掛 mem，連線在失敗後仍會繼續使用。
+        # (Writes are re-enabled only for the attached :memory: database;
+        # the read-only state and the mem attach must be restored on any
+        # outcome since the connection outlives a failed comparison.)
+        conn.execute('PRAGMA query_only=0')
+        try:
+            conn.execute("ATTACH ':memory:' AS mem")
+            try:
+                # INTEGER affinity converts the parsed strings on insert, so the
+                # join compares ints against schema_def's integer columns
+                conn.execute('''
+                    CREATE TABLE mem.file_schema (
+                        table_name TEXT, column_name TEXT,
+                        type_id INTEGER, size INTEGER, position INTEGER
+                    )
+                ''')
+                conn.executemany('INSERT INTO mem.file_schema VALUES (?, ?, ?, ?, ?)', rows)
+                conn.commit()  # 結束隱含交易，否則 DETACH 會失敗 (end the implicit transaction so DETACH can run)
+
+                diffs = conn.execute('''
+                    SELECT f.table_name, f.column_name, f.type_id, f.size, f.position,
+                           d.table_name, d.type_id, d.size, d.position
+                    FROM mem.file_schema f
+                    LEFT JOIN schema_def d
+                      ON d.table_name = f.table_name AND d.column_name = f.column_name
+                    WHERE d.table_name IS NULL
+                       OR d.type_id <> f.type_id OR d.size <> f.size OR d.position <> f.position
+                ''').fetchall()
+            finally:
+                conn.rollback()  # 失敗時放棄未完成的交易 (abandon any half-finished transaction)
+                conn.execute('DETACH mem')
+        finally:
+            conn.execute('PRAGMA query_only=1')
+
+        for table_name, column_name, type_id, size, position, db_table, db_type, db_size, db_position in diffs:
+            if db_table is None:
+                self._record_difference('missing_in_db', table_name, column_name,
+                                        str(type_id), str(size), str(position))
+            else:
+                self._record_difference('different', table_name, column_name,
+                                        str(type_id), str(size), str(position),
+                                        str(db_type), str(db_size), str(db_position))
+
+    def compare_schemas_pandas(self):
+        """以 pandas 向量化合併完成比對。 (Compare with a vectorized pandas merge)
+
+        把兩邊載入 DataFrame 後用 left merge + 向量化的欄位比較取代
+        逐列迴圈，內層工作全部在 NumPy 的 C 層執行。
+        (Loads both sides into DataFrames and replaces the per-row loop
+        with a left merge plus vectorized column compares, so the inner
+        work runs in NumPy's C layer.)
+        """
+        if pd is None:
+            raise RuntimeError(
+                'pandas is required for the pandas comparison engine '
+                '(pandas 比對引擎需要安裝 pandas)'
+            )
+
+        with open(self.schema_file, 'r') as f:
+            parsed_rows = [p for p in (self.parse_schema_line(l) for l in f if l.strip()) if p]
+
+        file_df = pd.DataFrame(parsed_rows, columns=['table', 'column', 'type', 'size', 'position'])
+        # 保留原始字串欄位供輸出，另建數值欄位供比較；非數值變成 NaN，
+        # 與資料庫的整數必不相等，因此會被列為差異而不是當掉。
+        # (Keep the original string columns for output and compare through
+        # numeric copies; non-numeric values coerce to NaN, which never
+        # equals the database integers, so they are reported instead of
+        # crashing.)
+        for field in ('type', 'size', 'position'):
+            file_df[field + '_n'] = pd.to_numeric(file_df[field], errors='coerce')
+
+        db_df = pd.read_sql_query(
+            'SELECT table_name AS "table", column_name AS "column", '
+            'type_id AS type_d, size AS size_d, position AS position_d FROM schema_def',
+            self._conn
+        )
+
+        merged = file_df.merge(db_df, on=['table', 'column'], how='left', indicator=True)
+        missing = merged[merged['_merge'] == 'left_only']
+        both = merged[merged['_merge'] == 'both']
+        different = both[(both['type_n'] != both['type_d'])
+                         | (both['size_n'] != both['size_d'])
+                         | (both['position_n'] != both['position_d'])]
+
+        for row in missing.itertuples():
+            self._record_difference('missing_in_db', row.table, row.column,
+                                    row.type, row.size, row.position)
+        for row in different.itertuples():
+            self._record_difference('different', row.table, row.column,
+                                    row.type, row.size, row.position,
+                                    str(int(row.type_d)), str(int(row.size_d)), str(int(row.position_d)))
+
+    def _record_difference(self, status: str, table_name: str, column_name: str,
+                           file_type: str, file_size: str, file_position: str,
+                           db_type: str = None, db_size: str = None, db_position: str = None):
+        """將發現的差異記錄到列表中。 (Record a difference in the differences list)
+
+        一筆差異只配置一個 tuple，而不是多層 dict。
+        (One tuple per difference instead of nested dicts.)
+        """
+        self.differences.append((status, table_name, column_name,
+                                 file_type, file_size, file_position,
+                                 db_type, db_size, db_position))
+
     def export_json(self, output_file: str):
         """將差異匯出為 JSON 檔案。 (Export differences to JSON file)"""
-        if not self.differences:
-            print("未發現差異。 (No differences found)")
-            return
-            
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(self.differences, f, indent=2, ensure_ascii=False)
-            
-        print(f"差異已匯出至 (Differences exported to) {output_file}")
+        export_differences_json(self.differences, output_file)
 
     def print_differences(self):
         """在主控台印出差異。 (Print differences to console)"""
-        if not self.differences:
-            print("未發現差異。 (No differences found)")
-            return
-            
-        for diff in self.differences:
-            print(f"\n資料表 (Table): {diff['table']}")
-            print("-" * 80)
-            print(f"欄位 (Column): {diff['column']}")
-            
-            if diff['status'] == 'missing_in_db':
-                print("狀態 (Status): 資料庫中缺少 (Missing in database)")
-                print("檔案中的值 (File values):", diff['file_info'])
-            else:
-                print("狀態 (Status): 值不符 (Different values)")
-                print("檔案中的值 (File values):", diff['file_info'])
-                print("資料庫中的值 (DB values):", diff['db_info'])
-            print("-" * 40)
+        print_differences(self.differences)
+
+def _as_records(differences: List[Tuple]):
+    """將 tuple 差異展開成輸出用的 dict。 (Expand tuple differences into output dicts)"""
+    for (status, table_name, column_name,
+         file_type, file_size, file_position,
+         db_type, db_size, db_position) in differences:
+        yield {
+            "status": status,
+            "table": table_name,
+            "column": column_name,
+            "file_info": {"type": file_type, "size": file_size, "position": file_position},
+            "db_info": None if db_type is None else
+                       {"type": db_type, "size": db_size, "position": db_position}
+        }
+
+def export_differences_json(differences: List[Tuple], output_file: str):
+    """將差異列表匯出為 JSON 檔案。 (Export a differences list to a JSON file)"""
+    if not differences:
+        print("未發現差異。 (No differences found)")
+        return
+
+    records = list(_as_records(differences))
+    if orjson is not None:
+        # orjson 直接輸出 UTF-8 位元組，比標準函式庫快數倍。
+        # (orjson writes UTF-8 bytes directly, several times faster than the stdlib.)
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(records, option=orjson.OPT_INDENT_2))
+    else:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(records, f, indent=2, ensure_ascii=False)
+
+    print(f"差異已匯出至 (Differences exported to) {output_file}")
+
+def print_differences(differences: List[Tuple]):
+    """在主控台印出差異列表。 (Print a differences list to the console)"""
+    if not differences:
+        print("未發現差異。 (No differences found)")
+        return
+
+    # 先組成單一字串再一次寫出，避免逐列 print 的系統呼叫開銷。
+    # (Assemble one string and write it once instead of a print syscall per line.)
+    out = []
+    for diff in _as_records(differences):
+        out.append(f"\n資料表 (Table): {diff['table']}\n")
+        out.append("-" * 80 + "\n")
+        out.append(f"欄位 (Column): {diff['column']}\n")
+
+        if diff['status'] == 'missing_in_db':
+            out.append("狀態 (Status): 資料庫中缺少 (Missing in database)\n")
+            out.append(f"檔案中的值 (File values): {diff['file_info']}\n")
+        else:
+            out.append("狀態 (Status): 值不符 (Different values)\n")
+            out.append(f"檔案中的值 (File values): {diff['file_info']}\n")
+            out.append(f"資料庫中的值 (DB values): {diff['db_info']}\n")
+        out.append("-" * 40 + "\n")
+    sys.stdout.write(''.join(out))
+
+def _compare_one(args: Tuple[str, str, str]) -> List[Tuple]:
+    """比對單一檔案的工作函式。 (Worker that compares one schema file)
+
+    必須是模組層級函式，ProcessPoolExecutor 才能序列化它；
+    每個工作行程開啟自己的資料庫連線。
+    (Must live at module level so ProcessPoolExecutor can pickle it;
+    each worker process opens its own database connection.)
+    """
+    schema_file, db_path, engine = args
+    comparer = SchemaComparer(schema_file, db_path)
+    if engine == 'sql':
+        comparer.compare_schemas_sql()
+    elif engine == 'pandas':
+        comparer.compare_schemas_pandas()
+    else:
+        comparer.compare_schemas()
+    comparer.close()
+    return comparer.differences
 
 def main():
     """
@@ -124,21 +376,41 @@ def main():
     Main function to run comparison.
     """
     import argparse
-    
+
     parser = argparse.ArgumentParser(description='Compare schema file with database. (比對 .sch 檔案與資料庫的結構)')
-    parser.add_argument('schema_file', help='Path to schema file (e.g., ds.sch). (.sch 檔案的路徑)')
+    parser.add_argument('schema_file', nargs='+', help='Path(s) to schema file (e.g., ds.sch). (.sch 檔案的路徑)')
     parser.add_argument('--db', default='schema.db', help='SQLite database file name (default: schema.db). (SQLite 資料庫檔案名稱)')
     parser.add_argument('--json', help='Export differences to JSON file. (將差異匯出至 JSON 檔案)')
-    
+    parser.add_argument('--engine', choices=['index', 'sql', 'pandas'], default='index',
+                        help='Comparison engine: in-memory index, SQL join or pandas merge (default: index). (比對引擎)')
+
     args = parser.parse_args()
-    
-    comparer = SchemaComparer(args.schema_file, args.db)
-    comparer.compare_schemas()
-    
+
+    if len(args.schema_file) > 1:
+        # 多個檔案之間沒有資料相依，平行比對；工作行程各自開連線，
+        # 這裡只收集結果。
+        # (No data dependency between files - compare them in parallel.
+        # Workers open their own connections; here we only collect results.)
+        differences = []
+        with ProcessPoolExecutor() as executor:
+            jobs = [(f, args.db, args.engine) for f in args.schema_file]
+            for diffs in executor.map(_compare_one, jobs):
+                differences.extend(diffs)
+    else:
+        comparer = SchemaComparer(args.schema_file[0], args.db)
+        if args.engine == 'sql':
+            comparer.compare_schemas_sql()
+        elif args.engine == 'pandas':
+            comparer.compare_schemas_pandas()
+        else:
+            comparer.compare_schemas()
+        comparer.close()
+        differences = comparer.differences
+
     if args.json:
-        comparer.export_json(args.json)
+        export_differences_json(differences, args.json)
     else:
-        comparer.print_differences()
+        print_differences(differences)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,72 @@
+import json
+from typing import Dict, List
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _iter_records(json_file: str):
+    """逐筆讀取差異 JSON 陣列。 (Stream records from a differences JSON array)
+
+    有安裝 ijson 時逐筆串流，記憶體使用量與檔案大小無關；
+    否則退回 json.load。
+    (Streams one record at a time with ijson so peak memory stays O(1);
+    falls back to json.load when ijson is unavailable.)
+    """
+    if ijson is not None:
+        with open(json_file, 'rb') as f:
+            yield from ijson.items(f, 'item')
+    else:
+        with open(json_file, 'r', encoding='utf-8') as f:
+            yield from json.load(f)
+
+
+def search_different_size(json_file: str, target_size: str = "3594") -> List[Dict]:
+    """篩選出檔案端 size 不等於 target_size 的差異。 (Filter differences whose file-side size differs from target_size)"""
+    out = []
+    for rec in _iter_records(json_file):
+        if rec.get('file_info', {}).get('size') != target_size:
+            out.append(rec)
+    return out
+
+
+def export_results(results: List[Dict], output_file: str):
+    """將篩選結果匯出為 JSON 檔案。 (Export filtered results to a JSON file)"""
+    if orjson is not None:
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
+    else:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+    print(f"結果已匯出至 (Results exported to) {output_file}")
+
+
+def main():
+    """
+    主函式，用於篩選差異檔案。
+    Main function to filter a differences file.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Filter schema differences by size. (依 size 篩選結構差異)')
+    parser.add_argument('json_file', help='Differences JSON file (e.g., schema_differences.json). (差異 JSON 檔案)')
+    parser.add_argument('--size', default='3594', help='Size value to exclude (default: 3594). (要排除的 size 值)')
+    parser.add_argument('--output', default='size_differences.json',
+                        help='Output JSON file (default: size_differences.json). (輸出 JSON 檔案)')
+
+    args = parser.parse_args()
+
+    results = search_different_size(args.json_file, args.size)
+    export_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()